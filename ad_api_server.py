@@ -6,17 +6,26 @@ Uses same proven architecture as venue-newsletter-tool
 
 import os
 import sys
+import base64
+import bisect
+import hashlib
 import json
+import multiprocessing
 import time
 import re
+import orjson
 import requests
 import secrets
+import threading
+import traceback
 import pytz
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from flask import Flask, request, jsonify, send_from_directory, Response, redirect, session, url_for
 from flask_cors import CORS
 from dotenv import load_dotenv
 from authlib.integrations.flask_client import OAuth
+from cachetools import TTLCache
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Timezone configuration
@@ -33,14 +42,26 @@ RUNWAY_API_BASE = 'https://api.dev.runwayml.com/v1'
 GOOGLE_VEO_API_KEY = os.getenv('GOOGLE_VEO_API_KEY')
 VEO_API_BASE = 'https://generativelanguage.googleapis.com/v1beta'
 
+# Max concurrent Gemini image calls per request (keeps us under rate limits)
+IMAGE_GENERATION_CONCURRENCY = int(os.getenv('IMAGE_GENERATION_CONCURRENCY', 5))
+
 # Import from local integrations folder
 from integrations.openai_client import OpenAIClient
 from integrations.gemini_client import GeminiClient
 from integrations.claude_client import ClaudeClient
+from postprocess import build_animation, postprocess, postprocess_to_file
 
 app = Flask(__name__, static_folder='.')
 CORS(app)
 
+# Where streamed image generations are written (served from /generated/<sha>.jpg).
+# Anchored on the app root like send_from_directory, not the working directory.
+# Cloud Run's filesystem lives in instance memory, so files are evicted after
+# GENERATED_IMAGE_TTL seconds and beyond the newest GENERATED_IMAGE_MAX_FILES
+GENERATED_IMAGE_DIR = os.path.join(app.root_path, os.getenv('GENERATED_IMAGE_DIR', os.path.join('static', 'generated')))
+GENERATED_IMAGE_TTL = int(os.getenv('GENERATED_IMAGE_TTL', 3600))
+GENERATED_IMAGE_MAX_FILES = int(os.getenv('GENERATED_IMAGE_MAX_FILES', 200))
+
 # Fix for running behind Cloud Run's proxy - ensures correct HTTPS URLs
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
@@ -63,6 +84,12 @@ def get_current_user():
     """Get current authenticated user from session"""
     return session.get('user')
 
+
+def ojson(obj, status=200):
+    """jsonify() replacement backed by orjson, used by the large image/copy responses"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
 # Initialize AI clients
 openai_client = OpenAIClient()
 gemini_client = GeminiClient()
@@ -72,6 +99,20 @@ print("[OK] OpenAI initialized")
 print("[OK] Gemini initialized")
 print("[OK] Claude initialized")
 
+
+def _warm_up_ai_clients():
+    """Establish DNS/TLS connections to each AI API so the first user request skips the handshake"""
+    for name, client in (('Gemini', gemini_client), ('Claude', claude_client), ('OpenAI', openai_client)):
+        try:
+            client.warm_up()
+        except Exception as e:
+            print(f"[API] WARNING - {name} warm-up failed: {e}")
+
+
+# Runs in the background so startup (and the gunicorn worker boot) isn't delayed
+if os.getenv('WARM_UP_AI_CLIENTS', 'true').lower() == 'true':
+    threading.Thread(target=_warm_up_ai_clients, name='ai-client-warmup', daemon=True).start()
+
 # GCS for drafts
 GCS_BUCKET_NAME = 'ad-generator-drafts'
 gcs_client = None
@@ -141,6 +182,42 @@ PLATFORM_SIZES = {
     ]
 }
 
+# Aspect ratio buckets for Gemini prompt guidance: (max width/height ratio, aspect_hint, composition_hint)
+ASPECT_TABLE = [
+    (0.6, "tall portrait format (9:16 story)", "full vertical composition from head to below waist, story-style framing"),
+    (0.85, "portrait format (4:5)", "vertical composition with more headroom"),
+    (1.2, "square format (1:1)", "centered composition with subjects filling the square frame"),
+    (1.5, "landscape format", "horizontal composition"),
+    (float('inf'), "wide landscape format (16:9 or wider)", "horizontal composition with subjects positioned to fill the wide frame"),
+]
+_ASPECT_THRESHOLDS = [threshold for threshold, _, _ in ASPECT_TABLE]
+
+# Aspect-specific prompt tails, built once per bucket (keyed by aspect_hint).
+# Only the frame size is filled in per call via .format(w=..., h=...).
+COMPOSITION_SUFFIX = {
+    aspect_hint: f"""
+
+CRITICAL COMPOSITION REQUIREMENTS:
+1. Generate this image EXACTLY for {aspect_hint} at {{w}}x{{h}}px dimensions.
+2. Use {composition_hint}.
+3. Ensure ALL important subjects (people, jewelry, faces) are fully visible and NOT cropped.
+4. Keep subjects centered with safe margins (at least 10% from all edges).
+5. For portrait/story formats: frame subjects from head to mid-torso, NOT full body.
+6. For landscape formats: use horizontal composition with subjects filling the frame width.
+7. For square formats: center subjects with equal padding on all sides.
+
+NEVER include any text, logos, watermarks, color codes, hex values, or brand marks in the image. Generate photography only."""
+    for _, aspect_hint, composition_hint in ASPECT_TABLE
+}
+
+ANIMATION_ASPECT_SUFFIX = {
+    aspect_hint: f"\n\nIMPORTANT: Compose this image specifically for {aspect_hint}. Use {composition_hint}. Frame: {{w}}x{{h}}px.\n\nDo NOT include any company logos, brand marks, watermarks, or text overlays in the image. Generate photography only without any branding elements."
+    for _, aspect_hint, composition_hint in ASPECT_TABLE
+}
+
+# Shared direction when all animation frames are sampled from one prompt as candidates
+COALESCED_FRAME_DIRECTIVE = "This image is one frame of a short looping animation: keep the subject, setting and lighting consistent, with only subtle changes in camera angle or zoom."
+
 # Google Ads Creative Best Practices (for Demand Gen and Performance Max)
 GOOGLE_ADS_BEST_PRACTICES = """
 GOOGLE ADS CREATIVE BEST PRACTICES:
@@ -157,6 +234,139 @@ GOOGLE ADS CREATIVE BEST PRACTICES:
 - Include clear visual hierarchy with one focal point
 """
 
+# Shared instructions for combining the user's brief with BriteCo brand style.
+# Image prompt and ad copy instructions are static system prompts; the
+# per-request brief goes in the user message.
+_BRIEF_COMBINATION_RULES = """=== HOW TO COMBINE THE BRIEF WITH BRAND GUIDELINES ===
+1. USE the subjects, scenes, and imagery described in the USER'S CREATIVE BRIEF
+2. APPLY the BriteCo brand style (colors, lighting, aesthetic) to those subjects
+3. If the brief describes a bear - create a bear image with BriteCo's brand colors and style
+4. If the brief describes a landscape - create that landscape with BriteCo's warm lighting and turquoise accents
+5. NEVER substitute the user's subjects with default "couple with engagement ring" imagery
+
+=== BRITECO BRAND STYLE (Apply these to the user's subjects) ===
+- Color accents: Turquoise, Navy, Orange (use visually in lighting, backgrounds, or props - NOT as text)
+- Aesthetic: Modern, clean, optimistic, trustworthy
+- Lighting: Warm, natural, professional quality
+- No gradients - solid colors only
+- No text, watermarks, or hex codes in the image"""
+
+IMAGE_PROMPT_SYSTEM_PROMPT = f"""You are an expert at creating image generation prompts for AI models.
+
+You create image generation prompts for BriteCo jewelry insurance ads. The USER'S CREATIVE BRIEF is your PRIMARY DIRECTIVE.
+
+{_BRIEF_COMBINATION_RULES}
+
+NEVER include hex color codes like #31D7CA in your prompt - just describe the colors by name (turquoise, navy, orange).
+
+Generate ONE detailed, creative prompt (200 words max) for Nano Banana (Google Gemini) image generator that COMBINES the user's creative brief subjects WITH the BriteCo brand style.
+Make it specific, visual, and actionable."""
+
+GOOGLE_ADS_IMAGE_PROMPT_SYSTEM_PROMPT = f"""You are an expert at creating image generation prompts for Google Ads campaigns.
+
+You create image generation prompts for BriteCo jewelry insurance ads. The USER'S CREATIVE BRIEF is your PRIMARY DIRECTIVE.
+
+{_BRIEF_COMBINATION_RULES}
+
+{GOOGLE_ADS_BEST_PRACTICES}
+
+IMPORTANT FOR GOOGLE ADS:
+- Images must be high-quality and work across YouTube, Discover, Gmail, and Display Network
+- Subject should be centered in 80% of frame space
+- Keep text overlay minimal (under 20% of image)
+- Ensure the imagery works well at smaller mobile sizes
+- Use clear visual hierarchy with one strong focal point
+
+NEVER include hex color codes like #31D7CA in your prompt - just describe the colors by name (turquoise, navy, orange).
+
+Generate ONE detailed, creative prompt (200 words max) for Nano Banana (Google Gemini) image generator based on the USER'S CREATIVE BRIEF.
+Make it specific, visual, and actionable."""
+
+# Platform-specific ad copy specs
+AD_COPY_PLATFORM_SPECS = {
+    'meta': {
+        'headline_limit': 27,
+        'primary_text_visible': 125,
+        'description_limit': 27,
+        'best_practices': 'Front-load value proposition in first 30 characters. Use emojis sparingly.'
+    },
+    'reddit': {
+        'headline_limit': 300,
+        'body_limit': 500,
+        'best_practices': 'Be authentic and conversational. Redditors value transparency and community.'
+    },
+    'pinterest': {
+        'title_limit': 100,
+        'title_visible': 40,
+        'description_limit': 500,
+        'best_practices': 'Focus on aspirational, visual language. Pinterest is about inspiration and discovery.'
+    }
+}
+
+
+def _ad_copy_platform_section(platform):
+    """Describe the specs and JSON schema for one platform's ad copy"""
+    specs = AD_COPY_PLATFORM_SPECS.get(platform, AD_COPY_PLATFORM_SPECS['meta'])
+
+    if platform == 'meta':
+        generate_section = """Generate:
+1. Headline (stay within 27 characters)
+2. Primary text (engaging, benefit-focused, first 125 chars are most visible)
+3. Description (stay within 27 characters, appears below primary text)
+4. Call-to-action suggestion
+
+JSON schema:
+{
+  "headline": "...",
+  "body": "...",
+  "description": "...",
+  "cta": "..."
+}"""
+    else:
+        generate_section = """Generate:
+1. Headline (stay within character limits)
+2. Primary text/body copy (engaging, benefit-focused)
+3. Call-to-action suggestion
+
+JSON schema:
+{
+  "headline": "...",
+  "body": "...",
+  "cta": "..."
+}"""
+
+    return f"""=== {platform.upper()} ===
+Platform specifications for {platform.upper()}:
+{', '.join([f'{k}: {v}' for k, v in specs.items()])}
+
+{generate_section}"""
+
+
+def _ad_copy_system_prompt(platforms):
+    """Build the static ad copy instructions for the platforms in a request"""
+    platform_sections = '\n\n'.join(_ad_copy_platform_section(platform) for platform in sorted(set(platforms)))
+
+    return f"""You are an expert social media copywriter for BriteCo jewelry insurance.
+
+Generate ad copy for one or more ad contexts. Each context has a key, a platform, an ad size and the text overlay on its image.
+
+BriteCo Brand Voice:
+- Modern, trustworthy, optimistic
+- Target: Millennials and Gen Z engaged couples
+- Focus on peace of mind and protecting what matters
+- Turquoise (#31D7CA), Navy (#272D3F), Orange (#FC883A) brand colors
+
+{platform_sections}
+
+Return a JSON object mapping each context key to an ad copy object following that platform's JSON schema.
+
+Return ONLY the JSON, no other text."""
+
+# Contexts per ad copy LLM call (each gets ~500 output tokens); larger batches are
+# split so the response stays within the model's output limit
+AD_COPY_BATCH_SIZE = int(os.getenv('AD_COPY_BATCH_SIZE', 8))
+
+
 @app.route('/')
 def serve_index():
     """Serve the main HTML page with user info injected"""
@@ -248,6 +458,11 @@ def serve_logo():
     """Serve the logo file"""
     return send_from_directory('.', 'logo file for claude.jpg')
 
+@app.route('/generated/<filename>')
+def serve_generated_image(filename):
+    """Serve content-addressed images written by streamed generations"""
+    return send_from_directory(GENERATED_IMAGE_DIR, filename, max_age=86400)
+
 @app.route('/logos/<filename>')
 def serve_logo_file(filename):
     """Serve logo files from logos subdirectory"""
@@ -331,7 +546,6 @@ Be specific and detailed. Focus on what you actually see in the image - if it's
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -340,7 +554,7 @@ Be specific and detailed. Focus on what you actually see in the image - if it's
 def generate_prompt():
     """Generate image prompt using Claude or OpenAI"""
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         # NEW: Accept combinedBrief (pre-merged campaign + image analysis from frontend)
         combined_brief = data.get('combinedBrief', '')
         platforms = data.get('platforms', [])
@@ -355,74 +569,17 @@ def generate_prompt():
         # Check if Google Ads platforms are selected
         is_google_ads = any(p.lower() in ['demandgen', 'pmax'] for p in platforms)
 
-        # Build platform-specific context using the pre-combined brief
+        # Static instructions go in the system prompt; the brief is per-request
         # IMPORTANT: User's creative brief takes PRIORITY over brand guidelines
-        if is_google_ads:
-            platform_context = f"""You are an expert at creating image generation prompts for Google Ads campaigns.
+        system_prompt = GOOGLE_ADS_IMAGE_PROMPT_SYSTEM_PROMPT if is_google_ads else IMAGE_PROMPT_SYSTEM_PROMPT
 
-Create an image generation prompt for BriteCo jewelry insurance ads for {', '.join(platforms)}.
+        prompt_context = f"""Create an image generation prompt for BriteCo jewelry insurance ads for {', '.join(platforms)}.
 
 === PRIMARY DIRECTIVE: USER'S CREATIVE BRIEF ===
-{combined_brief}
-
-=== HOW TO COMBINE THE BRIEF WITH BRAND GUIDELINES ===
-1. USE the subjects, scenes, and imagery described in the USER'S CREATIVE BRIEF above
-2. APPLY the BriteCo brand style (colors, lighting, aesthetic) to those subjects
-3. If the brief describes a bear - create a bear image with BriteCo's brand colors and style
-4. If the brief describes a landscape - create that landscape with BriteCo's warm lighting and turquoise accents
-5. NEVER substitute the user's subjects with default "couple with engagement ring" imagery
-
-=== BRITECO BRAND STYLE (Apply these to the user's subjects) ===
-- Color accents: Turquoise, Navy, Orange (use visually in lighting, backgrounds, or props - NOT as text)
-- Aesthetic: Modern, clean, optimistic, trustworthy
-- Lighting: Warm, natural, professional quality
-- No gradients - solid colors only
-- No text, watermarks, or hex codes in the image
-
-{GOOGLE_ADS_BEST_PRACTICES}
-
-IMPORTANT FOR GOOGLE ADS:
-- Images must be high-quality and work across YouTube, Discover, Gmail, and Display Network
-- Subject should be centered in 80% of frame space
-- Keep text overlay minimal (under 20% of image)
-- Ensure the imagery works well at smaller mobile sizes
-- Use clear visual hierarchy with one strong focal point
-
-NEVER include hex color codes like #31D7CA in your prompt - just describe the colors by name (turquoise, navy, orange).
-
-Generate ONE detailed, creative prompt (200 words max) for Nano Banana (Google Gemini) image generator based on the USER'S CREATIVE BRIEF above.
-Make it specific, visual, and actionable."""
-        else:
-            platform_context = f"""You are an expert at creating image generation prompts for AI models.
-
-Create an image generation prompt for BriteCo jewelry insurance ads for {', '.join(platforms)}.
-
-=== PRIMARY DIRECTIVE: USER'S CREATIVE BRIEF ===
-{combined_brief}
-
-=== HOW TO COMBINE THE BRIEF WITH BRAND GUIDELINES ===
-1. USE the subjects, scenes, and imagery described in the USER'S CREATIVE BRIEF above
-2. APPLY the BriteCo brand style (colors, lighting, aesthetic) to those subjects
-3. If the brief describes a bear - create a bear image with BriteCo's brand colors and style
-4. If the brief describes a landscape - create that landscape with BriteCo's warm lighting and turquoise accents
-5. NEVER substitute the user's subjects with default "couple with engagement ring" imagery
-
-=== BRITECO BRAND STYLE (Apply these to the user's subjects) ===
-- Color accents: Turquoise, Navy, Orange (use visually in lighting, backgrounds, or props - NOT as text)
-- Aesthetic: Modern, clean, optimistic, trustworthy
-- Lighting: Warm, natural, professional quality
-- No gradients - solid colors only
-- No text, watermarks, or hex codes in the image
-
-NEVER include hex color codes like #31D7CA in your prompt - just describe the colors by name (turquoise, navy, orange).
-
-Generate ONE detailed, creative prompt (200 words max) for Nano Banana (Google Gemini) image generator that COMBINES the user's creative brief subjects WITH the BriteCo brand style.
-Make it specific, visual, and actionable."""
-
-        prompt_context = platform_context
+{combined_brief}"""
 
         # Debug: Log what we're sending to the AI
-        print(f"[API] Full prompt being sent to AI ({len(prompt_context)} chars)")
+        print(f"[API] Full prompt being sent to AI ({len(system_prompt) + len(prompt_context)} chars)")
         print(f"[API] Combined brief is included: {'YES' if combined_brief else 'NO'}")
 
         # Use selected provider
@@ -430,6 +587,7 @@ Make it specific, visual, and actionable."""
             print("[API] Using Claude...")
             result = claude_client.generate_content(
                 prompt=prompt_context,
+                system_prompt=system_prompt,
                 max_tokens=500,
                 temperature=0.7
             )
@@ -438,6 +596,7 @@ Make it specific, visual, and actionable."""
             print("[API] Using Gemini...")
             result = gemini_client.generate_content(
                 prompt=prompt_context,
+                system_prompt=system_prompt,
                 max_tokens=500,
                 temperature=0.7
             )
@@ -446,6 +605,7 @@ Make it specific, visual, and actionable."""
             print("[API] Using OpenAI...")
             result = openai_client.generate_content(
                 prompt=prompt_context,
+                system_prompt=system_prompt,
                 max_tokens=500,
                 temperature=0.7
             )
@@ -453,7 +613,7 @@ Make it specific, visual, and actionable."""
 
         print(f"[API] Prompt generated successfully ({len(prompt)} chars)")
 
-        return jsonify({
+        return ojson({
             'success': True,
             'prompt': prompt,
             'provider': provider
@@ -461,125 +621,272 @@ Make it specific, visual, and actionable."""
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojson({'success': False, 'error': str(e)}, 500)
+
+
+def _aspect_hints(width, height):
+    """Return (aspect_hint, composition_hint) for the Gemini prompt at these dimensions"""
+    index = bisect.bisect_left(_ASPECT_THRESHOLDS, width / height)
+    return ASPECT_TABLE[index][1:]
+
+
+def _composition_prompt(prompt, width, height):
+    """Append the aspect-ratio composition requirements to an image prompt"""
+    aspect_hint, _ = _aspect_hints(width, height)
+    return prompt + COMPOSITION_SUFFIX[aspect_hint].format(w=width, h=height)
+
+
+# Process pool for CPU-bound image resize/encode/GIF work (keeps PIL off the gevent
+# loop, where it would stall every other connection in the worker), created on first
+# use so each gunicorn worker gets its own pool after forking
+_pil_pool = None
+_pil_pool_lock = threading.Lock()
+
+
+def _gevent_patched():
+    """Whether gevent has monkey-patched this process (gunicorn -k gevent)"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def _pil_pool_workers():
+    """
+    Size of the image process pool: PIL_POOL_WORKERS if set, else the CPUs this
+    container may actually use (affinity and cgroup quota, not the host's
+    os.cpu_count()) shared out across the gunicorn workers.
+    """
+    if os.getenv('PIL_POOL_WORKERS'):
+        return max(1, int(os.getenv('PIL_POOL_WORKERS')))
+
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    try:
+        # cgroup v2 quota, e.g. "200000 100000" for 2 CPUs ("max" when unlimited)
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, -(-int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return max(1, cpus // int(os.getenv('WEB_CONCURRENCY', 1)))
+
+
+def _get_pil_pool():
+    """Get or create the image post-processing process pool"""
+    global _pil_pool
+    with _pil_pool_lock:
+        if _pil_pool is None:
+            # Forked children would inherit the gevent hub from a patched gunicorn
+            # worker, so start clean interpreters instead in that case
+            mp_context = multiprocessing.get_context('spawn') if _gevent_patched() else None
+            _pil_pool = ProcessPoolExecutor(max_workers=_pil_pool_workers(), mp_context=mp_context)
+    return _pil_pool
+
+
+# In-process cache of Gemini image results keyed by sha256 of the prompt (plus a
+# variant tag so variation 1 and 2 of the same prompt stay distinct)
+IMAGE_CACHE_SIZE = int(os.getenv('IMAGE_CACHE_SIZE', 64))
+IMAGE_CACHE_TTL = int(os.getenv('IMAGE_CACHE_TTL', 3600))
+_image_cache = TTLCache(maxsize=IMAGE_CACHE_SIZE, ttl=IMAGE_CACHE_TTL)
+_image_cache_lock = threading.Lock()
+
+
+def _generate_image_cached(enhanced_prompt, variant='', use_cache=True):
+    """
+    Generate a Gemini image, reusing a cached result for an identical prompt.
+
+    Nano Banana is non-deterministic, and the UI regenerates by re-posting the same
+    prompt, so routes only pass use_cache=True when the client opts in with
+    useCache; a fresh result still refreshes the cache.
+    Returns the raw encoded image bytes (b'' if none was generated).
+    """
+    key = hashlib.sha256(f"{variant}\n{enhanced_prompt}".encode('utf-8')).hexdigest()
+
+    if use_cache:
+        with _image_cache_lock:
+            image_bytes = _image_cache.get(key)
+        if image_bytes:
+            print(f"[API] Image cache hit ({key[:12]})")
+            return image_bytes
+
+    result = gemini_client.generate_image(
+        prompt=enhanced_prompt,
+        model="gemini-2.5-flash-image"
+    )
+
+    # Raw bytes skip the base64 round trip; only the final JPEG is encoded
+    image_bytes = result.get('image_bytes', b'')
+    if image_bytes:
+        with _image_cache_lock:
+            _image_cache[key] = image_bytes
+    return image_bytes
+
+
+def _generate_ad_images(enhanced_prompt, targets, variation_num, use_cache=True, save_to_disk=False):
+    """
+    Generate one Gemini image for an aspect bucket and resize it to every
+    (platform, size) target in that bucket (runs on a worker thread).
+
+    With save_to_disk, each JPEG is written to GENERATED_IMAGE_DIR and its url
+    points at /generated/<file> instead of carrying an inline data URI.
+
+    Returns a list of (target_index, image_dict) for the targets that succeeded.
+    """
+    _, first_platform, first_size = targets[0]
+    label = f"{first_platform} {first_size['name']} - Variation {variation_num}"
+
+    try:
+        print(f"[API] Generating {label} ({len(targets)} size(s) in bucket)...")
+
+        # Generate with Gemini (Nano Banana) with aspect-specific prompt
+        image_bytes = _generate_image_cached(enhanced_prompt, f"variation-{variation_num}", use_cache)
+
+        if not image_bytes:
+            print(f"[API] WARNING - No image data for {label}")
+            return []
+
+    except Exception as img_error:
+        print(f"[API ERROR] Failed to generate {label}: {img_error}")
+        return []
+
+    # Resize/encode every size in the bucket in parallel on the process pool (CPU-bound, GIL-free)
+    if save_to_disk:
+        futures = [
+            _get_pil_pool().submit(postprocess_to_file, image_bytes, size['width'], size['height'], GENERATED_IMAGE_DIR)
+            for _, _, size in targets
+        ]
+    else:
+        futures = [
+            _get_pil_pool().submit(postprocess, image_bytes, size['width'], size['height'])
+            for _, _, size in targets
+        ]
+
+    images = []
+    for (target_index, platform, size), future in zip(targets, futures):
+        try:
+            sized = future.result()
+            url = f"/generated/{sized}" if save_to_disk else f"data:image/jpeg;base64,{sized}"
+        except Exception as resize_error:
+            print(f"[API] WARNING - Resize failed, using original: {resize_error}")
+            url = f"data:image/jpeg;base64,{base64.b64encode(image_bytes).decode('ascii')}"
+
+        images.append((target_index, {
+            'platform': platform,
+            'size': f"{size['name']} - Variation {variation_num}",
+            'width': size['width'],
+            'height': size['height'],
+            'url': url
+        }))
+        print(f"[API] SUCCESS - {platform} {size['name']} - Variation {variation_num}")
+
+    return images
+
+
+def _prune_generated_images():
+    """Delete generated images older than GENERATED_IMAGE_TTL, then the oldest beyond GENERATED_IMAGE_MAX_FILES"""
+    try:
+        entries = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(GENERATED_IMAGE_DIR) if entry.is_file()]
+    except FileNotFoundError:
+        return
+
+    entries.sort(reverse=True)
+    cutoff = time.time() - GENERATED_IMAGE_TTL
+    removed = 0
+    for i, (mtime, path) in enumerate(entries):
+        if i >= GENERATED_IMAGE_MAX_FILES or mtime < cutoff:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # Already pruned by a concurrent request
+
+    if removed:
+        print(f"[API] Pruned {removed} generated image(s)")
+
+
+def _stream_generated_images(buckets, bucket_prompts, use_cache, total):
+    """Yield one SSE event per finished image, then a final 'done' event"""
+    count = 0
+    with ThreadPoolExecutor(max_workers=IMAGE_GENERATION_CONCURRENCY) as executor:
+        futures = [
+            executor.submit(_generate_ad_images, bucket_prompts[aspect_hint], targets, variation_num, use_cache, True)
+            for (aspect_hint, variation_num), targets in buckets.items()
+        ]
+        for future in as_completed(futures):
+            for target_index, image in future.result():
+                event = {**image, 'type': 'image', 'index': target_index}
+                count += 1
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+    print(f"[API] Streamed {count} images total")
+    _prune_generated_images()
+    done = {'type': 'done', 'success': True, 'count': count, 'total': total, 'generated_at': datetime.now().isoformat()}
+    yield b"data: " + orjson.dumps(done) + b"\n\n"
+
 
 @app.route('/api/generate-images', methods=['POST'])
 def generate_images():
     """Generate images using Gemini (Nano Banana) - 2 variations per size"""
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         prompt = data.get('prompt', '')
         platforms = data.get('platforms', [])
+        # Generating again is how the UI regenerates, so results are fresh unless the
+        # caller opts in to reusing cached images for an identical prompt
+        use_cache = data.get('useCache', False)
 
         print(f"\n[API] Generate Images Request")
         print(f"  Platforms: {platforms}")
         print(f"  Prompt: {prompt[:100]}...")
         print(f"  Generating 2 variations per size")
 
-        images = []
-
+        # Group every (platform, size) by aspect bucket so same-shaped sizes share
+        # one Gemini generation per variation, then run the buckets concurrently
+        buckets = {}
+        bucket_prompts = {}
+        target_index = 0
         for platform in platforms:
             platform_lower = platform.lower()
             sizes = PLATFORM_SIZES.get(platform_lower, PLATFORM_SIZES['meta'])
 
             for size in sizes:
+                aspect_hint, _ = _aspect_hints(size['width'], size['height'])
+                # The first size seen in a bucket drives its prompt; built once, shared by every variation
+                if aspect_hint not in bucket_prompts:
+                    bucket_prompts[aspect_hint] = _composition_prompt(prompt, size['width'], size['height'])
                 # Generate 2 variations for each size
                 for variation_num in range(1, 3):  # 1, 2
-                    try:
-                        print(f"[API] Generating {platform} - {size['name']} - Variation {variation_num}...")
-
-                        # Calculate aspect ratio for this size
-                        width = size['width']
-                        height = size['height']
-                        aspect_ratio = width / height
-
-                        # Determine aspect ratio string for Gemini prompt enhancement
-                        if aspect_ratio > 1.5:
-                            aspect_hint = "wide landscape format (16:9 or wider)"
-                            composition_hint = "horizontal composition with subjects positioned to fill the wide frame"
-                        elif aspect_ratio > 1.2:
-                            aspect_hint = "landscape format"
-                            composition_hint = "horizontal composition"
-                        elif aspect_ratio > 0.85:
-                            aspect_hint = "square format (1:1)"
-                            composition_hint = "centered composition with subjects filling the square frame"
-                        elif aspect_ratio > 0.6:
-                            aspect_hint = "portrait format (4:5)"
-                            composition_hint = "vertical composition with more headroom"
-                        else:
-                            aspect_hint = "tall portrait format (9:16 story)"
-                            composition_hint = "full vertical composition from head to below waist, story-style framing"
-
-                        # Enhance prompt with aspect ratio guidance
-                        enhanced_prompt = f"""{prompt}
-
-CRITICAL COMPOSITION REQUIREMENTS:
-1. Generate this image EXACTLY for {aspect_hint} at {width}x{height}px dimensions.
-2. Use {composition_hint}.
-3. Ensure ALL important subjects (people, jewelry, faces) are fully visible and NOT cropped.
-4. Keep subjects centered with safe margins (at least 10% from all edges).
-5. For portrait/story formats: frame subjects from head to mid-torso, NOT full body.
-6. For landscape formats: use horizontal composition with subjects filling the frame width.
-7. For square formats: center subjects with equal padding on all sides.
+                    buckets.setdefault((aspect_hint, variation_num), []).append((target_index, platform, size))
+                    target_index += 1
+
+        print(f"[API] {target_index} images from {len(buckets)} Gemini generations")
+
+        # stream=true: send each image as a Server-Sent Event as soon as its bucket
+        # finishes, pointing at a saved file instead of an inline data URI
+        if data.get('stream'):
+            return Response(
+                _stream_generated_images(buckets, bucket_prompts, use_cache, target_index),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
 
-NEVER include any text, logos, watermarks, color codes, hex values, or brand marks in the image. Generate photography only."""
+        with ThreadPoolExecutor(max_workers=IMAGE_GENERATION_CONCURRENCY) as executor:
+            futures = [
+                executor.submit(_generate_ad_images, bucket_prompts[aspect_hint], targets, variation_num, use_cache)
+                for (aspect_hint, variation_num), targets in buckets.items()
+            ]
+            results = [item for f in futures for item in f.result()]
 
-                        # Generate with Gemini (Nano Banana) with aspect-specific prompt
-                        result = gemini_client.generate_image(
-                            prompt=enhanced_prompt,
-                            model="gemini-2.5-flash-image"
-                        )
-
-                        image_data = result.get('image_data', '')
-
-                        if image_data:
-                            # Resize and compress image to reduce size
-                            try:
-                                import base64
-                                from PIL import Image, ImageOps
-                                from io import BytesIO
-
-                                # Decode base64 to PIL Image
-                                image_bytes = base64.b64decode(image_data)
-                                pil_image = Image.open(BytesIO(image_bytes))
-
-                                print(f"[API] Original image: {pil_image.size}")
-
-                                # Use ImageOps.pad to resize while keeping entire image visible (no cropping)
-                                # This adds padding if needed to reach exact dimensions
-                                target_width = size['width']
-                                target_height = size['height']
-                                pil_image = ImageOps.pad(pil_image, (target_width, target_height), Image.Resampling.LANCZOS, color=(255, 255, 255), centering=(0.5, 0.5))
-
-                                # Convert to JPEG with compression to reduce size
-                                buffer = BytesIO()
-                                pil_image.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True)
-                                compressed_bytes = buffer.getvalue()
-                                image_data = base64.b64encode(compressed_bytes).decode('utf-8')
-
-                                print(f"[API] Final: {pil_image.size}, compressed from {len(image_bytes)} to {len(compressed_bytes)} bytes")
-                            except Exception as resize_error:
-                                print(f"[API] WARNING - Resize failed, using original: {resize_error}")
-
-                            images.append({
-                                'platform': platform,
-                                'size': f"{size['name']} - Variation {variation_num}",
-                                'width': size['width'],
-                                'height': size['height'],
-                                'url': f"data:image/jpeg;base64,{image_data}"
-                            })
-                            print(f"[API] SUCCESS - {platform} {size['name']} - Variation {variation_num}")
-                        else:
-                            print(f"[API] WARNING - No image data for {platform} {size['name']} - Variation {variation_num}")
-
-                    except Exception as img_error:
-                        print(f"[API ERROR] Failed to generate {platform} {size['name']} - Variation {variation_num}: {img_error}")
+        # Restore the original platform/size/variation ordering
+        images = [image for _, image in sorted(results, key=lambda item: item[0])]
 
         print(f"[API] Generated {len(images)} images total")
 
-        return jsonify({
+        return ojson({
             'success': True,
             'images': images,
             'generated_at': datetime.now().isoformat()
@@ -587,16 +894,15 @@ NEVER include any text, logos, watermarks, color codes, hex values, or brand mar
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojson({'success': False, 'error': str(e)}, 500)
 
 
 @app.route('/api/generate-single-image', methods=['POST'])
 def generate_single_image():
     """Generate a single image for a specific platform/size - used for regenerating individual images"""
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         prompt = data.get('prompt', '')
         platform = data.get('platform', '')
         width = data.get('width', 1080)
@@ -607,73 +913,21 @@ def generate_single_image():
         print(f"  Platform: {platform}")
         print(f"  Size: {size_name} ({width}x{height})")
 
-        # Calculate aspect ratio for prompt enhancement
-        aspect_ratio = width / height
-
-        if aspect_ratio > 1.5:
-            aspect_hint = "wide landscape format (16:9 or wider)"
-            composition_hint = "horizontal composition with subjects positioned to fill the wide frame"
-        elif aspect_ratio > 1.2:
-            aspect_hint = "landscape format"
-            composition_hint = "horizontal composition"
-        elif aspect_ratio > 0.85:
-            aspect_hint = "square format (1:1)"
-            composition_hint = "centered composition with subjects filling the square frame"
-        elif aspect_ratio > 0.6:
-            aspect_hint = "portrait format (4:5)"
-            composition_hint = "vertical composition with more headroom"
-        else:
-            aspect_hint = "tall portrait format (9:16 story)"
-            composition_hint = "full vertical composition from head to below waist, story-style framing"
-
         # Enhance prompt with aspect ratio guidance
-        enhanced_prompt = f"""{prompt}
+        enhanced_prompt = _composition_prompt(prompt, width, height)
 
-CRITICAL COMPOSITION REQUIREMENTS:
-1. Generate this image EXACTLY for {aspect_hint} at {width}x{height}px dimensions.
-2. Use {composition_hint}.
-3. Ensure ALL important subjects (people, jewelry, faces) are fully visible and NOT cropped.
-4. Keep subjects centered with safe margins (at least 10% from all edges).
-5. For portrait/story formats: frame subjects from head to mid-torso, NOT full body.
-6. For landscape formats: use horizontal composition with subjects filling the frame width.
-7. For square formats: center subjects with equal padding on all sides.
+        # Generate with Gemini (regenerating should give a new image, so the cache is opt-in here)
+        image_bytes = _generate_image_cached(enhanced_prompt, 'single', data.get('useCache', False))
 
-NEVER include any text, logos, watermarks, color codes, hex values, or brand marks in the image. Generate photography only."""
-
-        # Generate with Gemini
-        result = gemini_client.generate_image(
-            prompt=enhanced_prompt,
-            model="gemini-2.5-flash-image"
-        )
-
-        image_data = result.get('image_data', '')
-
-        if image_data:
-            # Resize and compress image
+        if image_bytes:
+            # Resize (pad to keep entire image visible, no cropping) and compress image
             try:
-                import base64
-                from PIL import Image, ImageOps
-                from io import BytesIO
-
-                image_bytes = base64.b64decode(image_data)
-                pil_image = Image.open(BytesIO(image_bytes))
-
-                print(f"[API] Original image: {pil_image.size}")
-
-                # Resize to target dimensions (pad to keep entire image visible, no cropping)
-                pil_image = ImageOps.pad(pil_image, (width, height), Image.Resampling.LANCZOS, color=(255, 255, 255), centering=(0.5, 0.5))
-
-                # Compress
-                buffer = BytesIO()
-                pil_image.convert('RGB').save(buffer, format='JPEG', quality=85, optimize=True)
-                compressed_bytes = buffer.getvalue()
-                image_data = base64.b64encode(compressed_bytes).decode('utf-8')
-
-                print(f"[API] Final: {pil_image.size}")
+                image_data = _get_pil_pool().submit(postprocess, image_bytes, width, height).result()
             except Exception as resize_error:
                 print(f"[API] WARNING - Resize failed, using original: {resize_error}")
+                image_data = base64.b64encode(image_bytes).decode('ascii')
 
-            return jsonify({
+            return ojson({
                 'success': True,
                 'image': {
                     'platform': platform,
@@ -684,20 +938,114 @@ NEVER include any text, logos, watermarks, color codes, hex values, or brand mar
                 }
             })
         else:
-            return jsonify({'success': False, 'error': 'No image generated'}), 500
+            return ojson({'success': False, 'error': 'No image generated'}, 500)
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojson({'success': False, 'error': str(e)}, 500)
+
+
+# Markdown code fences (```json ... ```) around model JSON output
+_FENCE_RE = re.compile(r'```(?:json)?\s*|\s*```\s*$', re.MULTILINE)
+# Outermost {...} span, for responses with text around the JSON
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+
+def _default_ad_copy(copy_text=''):
+    """
+    Fallback ad copy when the model's response can't be parsed (the raw reply
+    becomes the headline) or parsed but has no entry for a context (generic headline)
+    """
+    return {
+        'headline': copy_text[:100] or 'Protect What You Love',
+        'body': 'Protect what matters most with BriteCo jewelry insurance.',
+        'cta': 'Get Protected'
+    }
+
+
+def _generate_ad_copy_batch(contexts, campaign_text, provider):
+    """
+    Generate ad copy for several (platform, size, overlay) contexts in one LLM call.
+
+    Args:
+        contexts: List of dicts with key, platform, sizeName, textOverlay
+        campaign_text: Shared campaign context
+        provider: 'claude' or 'openai'
+
+    Returns:
+        Dict mapping each context key to its ad copy dict
+    """
+    # Platform instructions go in the system prompt, only for the platforms requested
+    system_prompt = _ad_copy_system_prompt([ctx['platform'] for ctx in contexts])
+
+    prompt_context = f"""Campaign context: {campaign_text}
+
+Produce ad copy for the following contexts:
+{json.dumps(contexts, indent=2)}"""
+
+    max_tokens = 500 * len(contexts)
+
+    # Use selected provider
+    if provider == 'claude':
+        print("[API] Using Claude...")
+        result = claude_client.generate_content(
+            prompt=prompt_context,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+        copy_text = result.get('content', '')
+    else:
+        print("[API] Using OpenAI...")
+        result = openai_client.generate_content(
+            prompt=prompt_context,
+            system_prompt=system_prompt,
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+        copy_text = result.get('content', '')
+
+    # Remove markdown code blocks if present
+    copy_text = _FENCE_RE.sub('', copy_text).strip()
+
+    try:
+        parsed = json.loads(copy_text)
+    except ValueError:
+        # Tolerate stray preamble/postamble around the JSON object
+        match = _JSON_OBJECT_RE.search(copy_text)
+        try:
+            parsed = json.loads(match.group(0)) if match else None
+        except ValueError:
+            parsed = None
+
+    # A single context may come back unkeyed, or under a key other than the one we sent
+    if len(contexts) == 1 and isinstance(parsed, dict):
+        if 'headline' in parsed:
+            parsed = {contexts[0]['key']: parsed}
+        elif len(parsed) == 1 and isinstance(next(iter(parsed.values())), dict):
+            parsed = {contexts[0]['key']: next(iter(parsed.values()))}
+
+    ad_copies = {}
+    for ctx in contexts:
+        if not isinstance(parsed, dict):
+            # If JSON parsing fails, create default structure
+            ad_copies[ctx['key']] = _default_ad_copy(copy_text)
+            continue
+        ad_copy = parsed.get(ctx['key'])
+        if not isinstance(ad_copy, dict):
+            print(f"[API] WARNING - No ad copy returned for {ctx['key']}, using default")
+            ad_copy = _default_ad_copy()
+        ad_copies[ctx['key']] = ad_copy
+
+    return ad_copies
 
 
 @app.route('/api/generate-ad-copy', methods=['POST'])
 def generate_ad_copy():
     """Generate platform-specific ad copy using Claude or OpenAI"""
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         platform = data.get('platform', '').lower()
         size_name = data.get('sizeName', '')
         campaign_text = data.get('campaignText', '')
@@ -708,151 +1056,130 @@ def generate_ad_copy():
         print(f"  Platform: {platform}, Size: {size_name}")
         print(f"  Provider: {provider}")
 
-        # Platform-specific specs
-        platform_specs = {
-            'meta': {
-                'headline_limit': 27,
-                'primary_text_visible': 125,
-                'description_limit': 27,
-                'best_practices': 'Front-load value proposition in first 30 characters. Use emojis sparingly.'
-            },
-            'reddit': {
-                'headline_limit': 300,
-                'body_limit': 500,
-                'best_practices': 'Be authentic and conversational. Redditors value transparency and community.'
-            },
-            'pinterest': {
-                'title_limit': 100,
-                'title_visible': 40,
-                'description_limit': 500,
-                'best_practices': 'Focus on aspirational, visual language. Pinterest is about inspiration and discovery.'
-            }
+        context = {
+            'key': f"{platform}_{size_name}",
+            'platform': platform,
+            'sizeName': size_name,
+            'textOverlay': text_overlay
         }
+        ad_copy = _generate_ad_copy_batch([context], campaign_text, provider)[context['key']]
 
-        specs = platform_specs.get(platform, platform_specs['meta'])
+        print(f"[API] Ad copy generated successfully")
 
-        # Build prompt based on platform
-        if platform == 'meta':
-            prompt_context = f"""You are an expert social media copywriter for BriteCo jewelry insurance.
+        return ojson({
+            'success': True,
+            'adCopy': ad_copy,
+            'provider': provider
+        })
 
-Generate ad copy for a {platform.upper()} ad campaign.
+    except Exception as e:
+        print(f"[API ERROR] {str(e)}")
+        traceback.print_exc()
+        return ojson({'success': False, 'error': str(e)}, 500)
 
-Campaign context: {campaign_text}
-Text overlay on image: "{text_overlay}"
-Ad size: {size_name}
 
-Platform specifications for {platform.upper()}:
-{', '.join([f'{k}: {v}' for k, v in specs.items()])}
+@app.route('/api/generate-ad-copy-batch', methods=['POST'])
+def generate_ad_copy_batch():
+    """Generate ad copy for several platforms/sizes in a single LLM call"""
+    try:
+        data = orjson.loads(request.get_data())
+        campaign_text = data.get('campaignText', '')
+        provider = data.get('provider', 'claude')
+        items = data.get('items', [])
+
+        if not items:
+            return ojson({'success': False, 'error': 'No items specified'}, 400)
+
+        contexts = []
+        for i, item in enumerate(items):
+            platform = item.get('platform', '').lower()
+            size_name = item.get('sizeName', '')
+            contexts.append({
+                'key': item.get('key') or f"{platform}_{size_name}_{i}",
+                'platform': platform,
+                'sizeName': size_name,
+                'textOverlay': item.get('textOverlay', '')
+            })
 
-BriteCo Brand Voice:
-- Modern, trustworthy, optimistic
-- Target: Millennials and Gen Z engaged couples
-- Focus on peace of mind and protecting what matters
-- Turquoise (#31D7CA), Navy (#272D3F), Orange (#FC883A) brand colors
+        print(f"\n[API] Generate Ad Copy Batch Request")
+        print(f"  Contexts: {[ctx['key'] for ctx in contexts]}")
+        print(f"  Provider: {provider}")
 
-Generate:
-1. Headline (stay within 27 characters)
-2. Primary text (engaging, benefit-focused, first 125 chars are most visible)
-3. Description (stay within 27 characters, appears below primary text)
-4. Call-to-action suggestion
+        # Keep each LLM call to AD_COPY_BATCH_SIZE contexts, running the chunks concurrently
+        chunks = [contexts[i:i + AD_COPY_BATCH_SIZE] for i in range(0, len(contexts), AD_COPY_BATCH_SIZE)]
+        ad_copies = {}
+        with ThreadPoolExecutor(max_workers=min(len(chunks), IMAGE_GENERATION_CONCURRENCY)) as executor:
+            for chunk_copies in executor.map(lambda chunk: _generate_ad_copy_batch(chunk, campaign_text, provider), chunks):
+                ad_copies.update(chunk_copies)
 
-Return as JSON:
-{{
-  "headline": "...",
-  "body": "...",
-  "description": "...",
-  "cta": "..."
-}}
+        print(f"[API] Ad copy generated for {len(ad_copies)} contexts in {len(chunks)} call(s)")
 
-Return ONLY the JSON, no other text."""
-        else:
-            prompt_context = f"""You are an expert social media copywriter for BriteCo jewelry insurance.
+        return ojson({
+            'success': True,
+            'adCopies': ad_copies,
+            'provider': provider
+        })
 
-Generate ad copy for a {platform.upper()} ad campaign.
+    except Exception as e:
+        print(f"[API ERROR] {str(e)}")
+        traceback.print_exc()
+        return ojson({'success': False, 'error': str(e)}, 500)
 
-Campaign context: {campaign_text}
-Text overlay on image: "{text_overlay}"
-Ad size: {size_name}
 
-Platform specifications for {platform.upper()}:
-{', '.join([f'{k}: {v}' for k, v in specs.items()])}
+def _generate_animation_frame(base_prompt, variation_prompt, aspect_suffix, i, frame_count, use_cache=True):
+    """Generate a single animation frame's raw image bytes (runs on a worker thread)"""
+    try:
+        enhanced_prompt = f"{base_prompt}\n\n{variation_prompt}".strip()
 
-BriteCo Brand Voice:
-- Modern, trustworthy, optimistic
-- Target: Millennials and Gen Z engaged couples
-- Focus on peace of mind and protecting what matters
-- Turquoise (#31D7CA), Navy (#272D3F), Orange (#FC883A) brand colors
+        print(f"[API] Generating frame {i+1}/{frame_count}...")
 
-Generate:
-1. Headline (stay within character limits)
-2. Primary text/body copy (engaging, benefit-focused)
-3. Call-to-action suggestion
+        enhanced_prompt += aspect_suffix
 
-Return as JSON:
-{{
-  "headline": "...",
-  "body": "...",
-  "cta": "..."
-}}
+        # Generate frame with Gemini
+        image_bytes = _generate_image_cached(enhanced_prompt, 'frame', use_cache)
 
-Return ONLY the JSON, no other text."""
+        if image_bytes:
+            print(f"[API] Frame {i+1} generated successfully")
+            return image_bytes
 
-        # Use selected provider
-        if provider == 'claude':
-            print("[API] Using Claude...")
-            result = claude_client.generate_content(
-                prompt=prompt_context,
-                max_tokens=500,
-                temperature=0.7
-            )
-            copy_text = result.get('content', '')
-        else:
-            print("[API] Using OpenAI...")
-            result = openai_client.generate_content(
-                prompt=prompt_context,
-                max_tokens=500,
-                temperature=0.7
-            )
-            copy_text = result.get('content', '')
+    except Exception as frame_error:
+        print(f"[API ERROR] Failed to generate frame {i+1}: {frame_error}")
 
-        # Parse JSON from response
-        import json
-        import re
+    return None
 
-        # Remove markdown code blocks if present
-        copy_text = re.sub(r'```json\s*', '', copy_text)
-        copy_text = re.sub(r'```\s*', '', copy_text)
-        copy_text = copy_text.strip()
 
-        try:
-            ad_copy = json.loads(copy_text)
-        except:
-            # If JSON parsing fails, create default structure
-            ad_copy = {
-                'headline': copy_text[:100],
-                'body': 'Protect what matters most with BriteCo jewelry insurance.',
-                'cta': 'Get Protected'
-            }
+def _generate_animation_frames_coalesced(base_prompt, aspect_suffix, frame_count):
+    """
+    Generate all animation frames as candidates of a single Gemini request.
+    Returns a list of raw frame image bytes, or None if the model could not return
+    multiple candidates (callers fall back to one request per frame).
+    """
+    enhanced_prompt = f"{base_prompt}\n\n{COALESCED_FRAME_DIRECTIVE}".strip() + aspect_suffix
 
-        print(f"[API] Ad copy generated successfully")
+    try:
+        print(f"[API] Generating {frame_count} frames in one request...")
+        result = gemini_client.generate_image(
+            prompt=enhanced_prompt,
+            model="gemini-2.5-flash-image",
+            candidate_count=frame_count
+        )
+    except Exception as batch_error:
+        print(f"[API] WARNING - Coalesced frame request failed, falling back to per-frame: {batch_error}")
+        return None
 
-        return jsonify({
-            'success': True,
-            'adCopy': ad_copy,
-            'provider': provider
-        })
+    frames = [image['image_bytes'] for image in result.get('images') or []]
+
+    if len(frames) < 2:
+        print(f"[API] WARNING - Only {len(frames)} coalesced frame(s) returned, falling back to per-frame")
+        return None
+    return frames
 
-    except Exception as e:
-        print(f"[API ERROR] {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/generate-animation', methods=['POST'])
 def generate_animation():
     """Generate animated GIF from multiple image variations"""
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         base_prompt = data.get('prompt', '')
         width = data.get('width', 1080)
         height = data.get('height', 1080)
@@ -860,6 +1187,15 @@ def generate_animation():
         fps = data.get('fps', 2)  # Frames per second (default: 2)
         platform = data.get('platform', 'Meta')
         size_name = data.get('sizeName', 'Square')
+        # Set includeEditFrames (or include_frames) to false to skip the per-frame editing
+        # payload and only get the GIF; the editor needs the frames, so they stay on by default
+        include_frames = data.get('includeEditFrames', data.get('include_frames', True))
+        include_frames = str(request.args.get('include_frames', include_frames)).lower() != 'false'
+        # Fresh frames by default so regenerating a GIF gives new frames (cache is opt-in)
+        use_cache = data.get('useCache', False)
+        # Opt in to sampling every frame as a candidate of one Gemini request (one
+        # round-trip instead of frame_count, but frames don't follow the variation prompts)
+        coalesce_frames = data.get('coalesceFrames', False)
 
         # Ensure frame_count is within limits
         frame_count = min(max(frame_count, 3), 7)  # Between 3 and 7 frames
@@ -868,7 +1204,6 @@ def generate_animation():
         print(f"  Platform: {platform}, Size: {size_name}")
         print(f"  Frames: {frame_count}, FPS: {fps}")
         print(f"  Dimensions: {width}x{height}")
-        frames = []
 
         # Define prompt variations for animation effect
         variations = [
@@ -881,112 +1216,58 @@ def generate_animation():
             "Return to original composition with warm lighting"
         ]
 
-        for i in range(frame_count):
-            try:
-                variation_prompt = variations[i] if i < len(variations) else ""
-                enhanced_prompt = f"{base_prompt}\n\n{variation_prompt}".strip()
-
-                print(f"[API] Generating frame {i+1}/{frame_count}...")
-
-                # Calculate aspect ratio hints
-                aspect_ratio = width / height
-                if aspect_ratio > 1.5:
-                    aspect_hint = "wide landscape format (16:9 or wider)"
-                    composition_hint = "horizontal composition with subjects positioned to fill the wide frame"
-                elif aspect_ratio > 1.2:
-                    aspect_hint = "landscape format"
-                    composition_hint = "horizontal composition"
-                elif aspect_ratio > 0.85:
-                    aspect_hint = "square format (1:1)"
-                    composition_hint = "centered composition with subjects filling the square frame"
-                elif aspect_ratio > 0.6:
-                    aspect_hint = "portrait format (4:5)"
-                    composition_hint = "vertical composition with more headroom"
-                else:
-                    aspect_hint = "tall portrait format (9:16 story)"
-                    composition_hint = "full vertical composition from head to below waist, story-style framing"
-
-                enhanced_prompt += f"\n\nIMPORTANT: Compose this image specifically for {aspect_hint}. Use {composition_hint}. Frame: {width}x{height}px.\n\nDo NOT include any company logos, brand marks, watermarks, or text overlays in the image. Generate photography only without any branding elements."
+        # Every frame shares the same size, so the aspect guidance is built once
+        aspect_hint, _ = _aspect_hints(width, height)
+        aspect_suffix = ANIMATION_ASPECT_SUFFIX[aspect_hint].format(w=width, h=height)
+
+        frames = None
+        if coalesce_frames:
+            frames = _generate_animation_frames_coalesced(base_prompt, aspect_suffix, frame_count)
+
+        if frames is None:
+            with ThreadPoolExecutor(max_workers=IMAGE_GENERATION_CONCURRENCY) as executor:
+                futures = [
+                    executor.submit(
+                        _generate_animation_frame,
+                        base_prompt,
+                        variations[i] if i < len(variations) else "",
+                        aspect_suffix,
+                        i, frame_count, use_cache
+                    )
+                    for i in range(frame_count)
+                ]
+                # Keep frames in sequence order for the GIF
+                frames = [frame for frame in (f.result() for f in futures) if frame is not None]
 
-                # Generate frame with Gemini
-                result = gemini_client.generate_image(
-                    prompt=enhanced_prompt,
-                    model="gemini-2.5-flash-image"
-                )
-
-                image_data = result.get('image_data', '')
-
-                if image_data:
-                    import base64
-                    from PIL import Image, ImageOps
-                    from io import BytesIO
-
-                    # Decode and resize frame
-                    image_bytes = base64.b64decode(image_data)
-                    pil_image = Image.open(BytesIO(image_bytes))
-
-                    # Resize to exact dimensions (pad to keep entire image visible, no cropping)
-                    pil_image = ImageOps.pad(pil_image, (width, height), Image.Resampling.LANCZOS, color=(255, 255, 255), centering=(0.5, 0.5))
-
-                    frames.append(pil_image.convert('RGB'))
-                    print(f"[API] Frame {i+1} generated successfully")
+        if len(frames) == 0:
+            return ojson({'success': False, 'error': 'No frames generated'}, 500)
 
-            except Exception as frame_error:
-                print(f"[API ERROR] Failed to generate frame {i+1}: {frame_error}")
+        print(f"[API] Creating GIF from {len(frames)} frames at {fps} FPS ({int(1000 / fps)}ms per frame)")
 
-        if len(frames) == 0:
-            return jsonify({'success': False, 'error': 'No frames generated'}), 500
-
-        print(f"[API] Creating GIF from {len(frames)} frames...")
-
-        # Create animated GIF
-        from io import BytesIO
-        import base64
-
-        # Convert frames to base64 for individual editing
-        frame_images = []
-        for i, frame in enumerate(frames):
-            frame_buffer = BytesIO()
-            frame.save(frame_buffer, format='PNG')
-            frame_base64 = base64.b64encode(frame_buffer.getvalue()).decode('utf-8')
-            frame_images.append(f"data:image/png;base64,{frame_base64}")
-
-        gif_buffer = BytesIO()
-
-        # Calculate duration per frame in milliseconds based on FPS
-        duration_ms = int(1000 / fps)
-
-        print(f"[API] Creating GIF with {len(frames)} frames at {fps} FPS ({duration_ms}ms per frame)")
-
-        # Save as animated GIF
-        frames[0].save(
-            gif_buffer,
-            format='GIF',
-            save_all=True,
-            append_images=frames[1:],
-            duration=duration_ms,
-            loop=0,  # Infinite loop
-            optimize=True
-        )
+        # Pad, quantize and encode on the process pool; the per-frame JPEGs for
+        # individual editing are skipped when the caller only wants the GIF
+        gif_data, frame_images, frame_count = _get_pil_pool().submit(
+            build_animation, frames, width, height, fps, include_frames
+        ).result()
 
-        gif_data = base64.b64encode(gif_buffer.getvalue()).decode('utf-8')
+        if frame_count == 0:
+            return ojson({'success': False, 'error': 'No frames generated'}, 500)
 
-        total_duration = len(frames) / fps
-        print(f"[API] Animation created successfully ({len(gif_buffer.getvalue())} bytes, {total_duration:.1f}s total)")
+        total_duration = frame_count / fps
+        print(f"[API] Animation created successfully ({total_duration:.1f}s total)")
 
-        return jsonify({
+        return ojson({
             'success': True,
             'animation': f"data:image/gif;base64,{gif_data}",
-            'frames': frame_images,  # Individual frames for editing
-            'frame_count': len(frames),
+            'frames': [f"data:image/jpeg;base64,{frame}" for frame in frame_images],  # Individual frames for editing
+            'frame_count': frame_count,
             'fps': fps
         })
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojson({'success': False, 'error': str(e)}, 500)
 
 
 # ============================================================================
@@ -1074,7 +1355,6 @@ The video should feel like a premium luxury brand commercial that makes viewers
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -1109,7 +1389,6 @@ def generate_video():
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -1274,7 +1553,6 @@ def get_video_status(task_id):
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -1366,7 +1644,6 @@ def proxy_veo_video(file_id):
         print(f"[API] Streaming Veo video, Content-Type: {content_type}")
 
         # Stream the response to the client
-        from flask import Response
         return Response(
             response.iter_content(chunk_size=8192),
             content_type=content_type,
@@ -1378,7 +1655,6 @@ def proxy_veo_video(file_id):
 
     except Exception as e:
         print(f"[API ERROR] Veo video proxy error: {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -1514,7 +1790,6 @@ def generate_video_sync():
 
     except Exception as e:
         print(f"[API ERROR] {str(e)}")
-        import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -1767,7 +2042,6 @@ def delete_project():
 
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 3000))
 
     print("=" * 80)
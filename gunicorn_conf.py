@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration for the BriteCo Ad Generator
+Requests spend nearly all their time waiting on Gemini/Claude/OpenAI, so gevent
+workers multiplex many concurrent users per process instead of one per thread.
+CPU-bound PIL work runs on ad_api_server's process pool so it never blocks the hub.
+"""
+
+import os
+
+bind = f":{os.environ.get('PORT', '8080')}"
+
+# The gevent worker monkey-patches the stdlib itself before loading the app, so
+# ad_api_server does not call monkey.patch_all(); set GUNICORN_WORKER_CLASS=gthread
+# to fall back to the previous threaded setup
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+# One gevent worker already multiplexes every connection; extra workers would each
+# hold their own image cache and PIL process pool inside the instance's memory limit
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))  # only used by gthread
+
+# Image batches and animations can take minutes end to end
+timeout = 300
@@ -5,7 +5,12 @@ For content generation using Claude models
 
 import os
 import time
-from anthropic import Anthropic
+import httpx
+from anthropic import Anthropic, DefaultHttpxClient
+
+# The SDK's default pool drops idle sockets after 5s, which would discard the
+# connection warm_up() opens at boot (and the one between back-to-back requests)
+CLAUDE_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=60.0)
 
 
 class ClaudeClient:
@@ -17,9 +22,13 @@ class ClaudeClient:
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment")
 
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = Anthropic(api_key=self.api_key, http_client=DefaultHttpxClient(limits=CLAUDE_HTTP_LIMITS))
         self.default_model = "claude-sonnet-4-5-20250929"  # Claude Sonnet 4.5 (current model for writing)
 
+    def warm_up(self):
+        """Open the API connection ahead of the first request (free models.list call)"""
+        self.client.models.list(limit=1)
+
     def generate_content(
         self,
         prompt: str,
@@ -4,11 +4,190 @@ Using the official google-genai Python SDK
 """
 
 import os
+import copy
+import hashlib
+import logging
+import random
+import re
+import threading
 import time
-import base64
-from typing import Dict, Optional
+import traceback
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional
+from cachetools import TTLCache
+from PIL import Image
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+
+logger = logging.getLogger(__name__)
+
+# orjson parses the search-result arrays much faster than the stdlib when available
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# SIMD-accelerated base64 for the multi-megabyte image payloads when available
+try:
+    import pybase64 as base64
+
+    _b64encode_str = base64.b64encode_as_string
+except ImportError:
+    import base64
+
+    def _b64encode_str(data) -> str:
+        return base64.b64encode(data).decode('ascii')
+
+# Keep-alive pool for the SDK's httpx client so back-to-back image calls reuse
+# one multiplexed HTTP/2 connection instead of paying a TLS handshake each time;
+# sized for the concurrent batch/analysis executors, idle sockets kept for 60s
+GEMINI_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=32, keepalive_expiry=60.0)
+
+
+# JSON array of result objects inside a model reply (fenced or not)
+_JSON_ARRAY_RE = re.compile(r'\[\s*\{.*\}\s*\]', re.DOTALL)
+
+# Canonical image data URI, capturing mime type and base64 payload in one match
+_DATA_URI_RE = re.compile(r'^data:(?P<mime>image/(?:png|jpeg|gif|webp));base64,(?P<data>.+)$', re.DOTALL)
+
+# Data-URI header substrings to mime type; anything else is treated as JPEG
+_MIME_FROM_HEADER = {'png': 'image/png', 'gif': 'image/gif', 'webp': 'image/webp'}
+
+
+def _cpu_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Executor for CPU-bound work. Under gevent (gunicorn -k gevent) patched threads
+    are greenlets that would run it serially on the hub, so use gevent's
+    native-thread executor there instead.
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+            return NativeThreadPoolExecutor(max_workers=max_workers)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def _extract_parts(response) -> list:
+    """Content parts of the first candidate, for either SDK response shape ([] if none)"""
+    parts = getattr(response, 'parts', None)
+    if parts:
+        return parts
+    candidates = getattr(response, 'candidates', None) or ()
+    if not candidates:
+        return []
+    content = getattr(candidates[0], 'content', None)
+    return getattr(content, 'parts', None) or []
+
+
+def _mime_from_header(header: str) -> str:
+    """Mime type named in a data-URI header (data:image/png;base64), defaulting to JPEG"""
+    header_lower = header.lower()
+    return next((mime for key, mime in _MIME_FROM_HEADER.items() if key in header_lower), 'image/jpeg')
+
+
+def _split_data_uri(value: str) -> tuple:
+    """(mime_type, base64_data) from a data URI or raw base64 (raw is assumed JPEG)"""
+    match = _DATA_URI_RE.match(value)
+    if match:
+        return match['mime'], match['data']
+    # Non-canonical headers (image/jpg, extra parameters, ...) take the slow path
+    header, sep, base64_data = value.partition(',')
+    if not sep:
+        return 'image/jpeg', value
+    return _mime_from_header(header), base64_data
+
+
+def _sniff_image_mime(data: bytes) -> Optional[str]:
+    """Mime type from an image's magic bytes, or None if it isn't PNG/JPEG/GIF/WebP"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+class ImageResult(dict):
+    """
+    generate_image result. Holds the raw "image_bytes" and base64-encodes
+    "image_data" only when first read (and vice versa), so callers that
+    want bytes never pay for the encode/decode round trip.
+    """
+
+    def __missing__(self, key):
+        if key == 'image_data' and dict.get(self, 'image_bytes'):
+            value = _b64encode_str(dict.__getitem__(self, 'image_bytes'))
+        elif key == 'image_bytes' and dict.get(self, 'image_data'):
+            value = base64.b64decode(dict.__getitem__(self, 'image_data'))
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or (
+            key in ('image_data', 'image_bytes') and bool(dict.get(self, 'image_bytes') or dict.get(self, 'image_data'))
+        )
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+# Transient failures worth retrying: HTTP 429 (rate limited), 5xx, and network/timeouts
+RETRYABLE_STATUS_CODES = {429}
+
+
+def _call_with_retry(fn, *args, max_attempts: int = 3, base: float = 0.5, cap: float = 8.0, **kwargs):
+    """
+    Call fn(*args, **kwargs), retrying rate-limit, server and network errors with
+    capped exponential backoff plus jitter; re-raises after the final attempt.
+    """
+    for attempt in range(max_attempts):
+        try:
+            return fn(*args, **kwargs)
+        except (errors.APIError, httpx.TransportError) as e:
+            retryable = (
+                isinstance(e, (errors.ServerError, httpx.TransportError))
+                or getattr(e, 'code', None) in RETRYABLE_STATUS_CODES
+            )
+            if not retryable or attempt == max_attempts - 1:
+                raise
+            delay = min(cap, base * 2 ** attempt) + random.random() * 0.25
+            logger.warning("%s: %s - retrying in %.2fs (attempt %d/%d)", type(e).__name__, e, delay, attempt + 2, max_attempts)
+            time.sleep(delay)
+
+
+# Google Search grounded results are stable for hours, so repeat newsletter
+# searches for the same (query, max_results) are served from memory
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 6 * 60 * 60
+_search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+_search_cache_lock = threading.Lock()
+
+
+# Base style for all venue newsletter images
+_BASE_STYLE = "Professional, elegant, modern wedding venue photography, warm natural lighting, high-end aesthetic, sophisticated composition"
+
+# Section-specific styles
+_STYLE_ADDITIONS = {
+    "news": "editorial style, newsworthy scene, subtle branding elements, contemporary venue space",
+    "tip": "intimate venue details, personalized touches, client-focused perspective, welcoming atmosphere",
+    "trend": "seasonal wedding decor, trendy color palette, stylish arrangements, inspirational setting"
+}
+
+# Newsletter image prompt with the base style baked in
+_PROMPT_TMPL = "{title} - " + _BASE_STYLE + ", {section_style}. {content}"
 
 
 class GeminiClient:
@@ -20,10 +199,19 @@ class GeminiClient:
             raise ValueError("GOOGLE_AI_API_KEY environment variable not set")
 
         # Initialize the client with API key
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = genai.Client(
+            api_key=self.api_key,
+            http_options=types.HttpOptions(
+                client_args={"http2": True, "limits": GEMINI_HTTP_LIMITS}
+            )
+        )
         # Use Gemini 3 Pro Image Preview for image generation
         self.default_model = os.getenv("DEFAULT_IMAGE_MODEL", "gemini-3-pro-image-preview")
 
+    def warm_up(self):
+        """Open the HTTP/2 connection ahead of the first request (free models.list call)"""
+        self.client.models.list(config={"page_size": 1})
+
     def generate_image(
         self,
         prompt: str,
@@ -31,6 +219,7 @@ class GeminiClient:
         aspect_ratio: str = "16:9",
         image_size: str = "1K",
         number_of_images: int = 1,
+        candidate_count: int = 1,
     ) -> Dict:
         """
         Generate an image using Nano Banana (Gemini 2.5 Flash Image)
@@ -40,11 +229,17 @@ class GeminiClient:
             model: Model to use (default: gemini-2.5-flash-image)
             aspect_ratio: Not used for Nano Banana (kept for compatibility)
             image_size: Not used for Nano Banana (kept for compatibility)
-            number_of_images: Not used for Nano Banana (kept for compatibility)
+            number_of_images: Images to return from a single request (sampled as
+                candidates); when > 1 every image is returned in "images"
+            candidate_count: Alias of number_of_images (the larger of the two wins)
 
         Returns:
+            ImageResult (a dict) with:
             {
-                "image_data": "base64_encoded_image",
+                "image_bytes": b"raw encoded image",
+                "image_data": "base64_encoded_image",  # computed on first access
+                "mime_type": "image/png",  # format of the image as returned by the API
+                "images": [ImageResult, ...],  # per candidate (image_bytes, mime_type), only when number_of_images > 1
                 "prompt": "original prompt",
                 "model": "model-used",
                 "cost_estimate": "$0.039",
@@ -56,6 +251,8 @@ class GeminiClient:
 
         model_name = model or self.default_model
         start_time = time.time()
+        # N images come back as N candidates of one request instead of N calls
+        candidate_count = max(candidate_count, number_of_images)
 
         try:
             # Use gemini-2.5-flash-image (Nano Banana) for image generation
@@ -64,91 +261,144 @@ class GeminiClient:
 
             # Generate image using generate_content
             # Note: gemini-2.5-flash-image is a dedicated image model, no config needed
-            response = self.client.models.generate_content(
+            # unless several candidates are requested in one round-trip
+            config = types.GenerateContentConfig(candidate_count=candidate_count) if candidate_count > 1 else None
+            response = _call_with_retry(
+                self.client.models.generate_content,
                 model=model_name,
-                contents=[prompt]  # MUST be a list!
+                contents=[prompt],  # MUST be a list!
+                config=config
             )
 
             generation_time_ms = int((time.time() - start_time) * 1000)
 
-            # Debug: Print response structure
-            print(f"[NANO BANANA DEBUG] Response received")
-            print(f"[NANO BANANA DEBUG] Response type: {type(response)}")
+            # Debug: log response structure
+            logger.debug("Image response received: %s", type(response))
 
             # Handle different response formats based on google-genai version
-            parts = []
-            if hasattr(response, 'parts'):
-                parts = response.parts
-            elif hasattr(response, 'candidates') and response.candidates:
-                # Newer API format
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    parts = candidate.content.parts
+            parts = _extract_parts(response)
 
-            print(f"[NANO BANANA DEBUG] Number of parts: {len(parts)}")
+            logger.debug("Number of parts: %d", len(parts))
 
-            # Extract image data from response parts using part.as_image()
+            # Extract image data from response parts (raw inline bytes, else part.as_image())
+            image_bytes = None
             image_data = None
+            mime_type = None
 
             for i, part in enumerate(parts):
-                print(f"[NANO BANANA DEBUG] Part {i}: has inline_data = {hasattr(part, 'inline_data')}, has text = {hasattr(part, 'text')}")
+                logger.debug("Part %d: has inline_data = %s, has text = %s", i, hasattr(part, 'inline_data'), hasattr(part, 'text'))
 
-                # Use the as_image() method to get Image object (per documentation)
                 if hasattr(part, 'inline_data') and part.inline_data:
                     try:
+                        # The API already returns encoded (PNG/JPEG/WebP) bytes, so ship
+                        # them as-is instead of decoding and re-encoding as PNG; base64
+                        # is deferred until a caller reads "image_data"
+                        if part.inline_data.data:
+                            mime_type = part.inline_data.mime_type or 'image/png'
+                            image_bytes = part.inline_data.data
+                            logger.debug("Using inline %s bytes: %d bytes", mime_type, len(image_bytes))
+                            break
+
+                        # Use the as_image() method to get Image object (per documentation)
                         # as_image() returns a google.genai.types.Image object
                         image_obj = part.as_image()
-                        print(f"[NANO BANANA DEBUG] Got Image object: {type(image_obj)}")
+                        logger.debug("Got Image object: %s", type(image_obj))
 
                         # The Image object has a _pil_image attribute for the actual PIL Image
                         if hasattr(image_obj, '_pil_image'):
                             pil_image = image_obj._pil_image
-                            print(f"[NANO BANANA DEBUG] Got PIL Image from _pil_image: {type(pil_image)}, size: {pil_image.size}")
-
-                            # Convert PIL Image to base64
-                            from io import BytesIO
-                            buffer = BytesIO()
-                            pil_image.save(buffer, format='PNG')
-                            image_bytes = buffer.getvalue()
-                            image_data = base64.b64encode(image_bytes).decode('utf-8')
+                            logger.debug("Got PIL Image from _pil_image: %s, size: %s", type(pil_image), pil_image.size)
+
+                            # Convert PIL Image to base64 (fast zlib level: the PNG is
+                            # base64'd and re-encoded downstream, so max compression buys nothing)
+                            # Encode from a zero-copy view, released before the buffer closes
+                            with BytesIO() as buffer:
+                                pil_image.save(buffer, format='PNG', compress_level=1, optimize=False)
+                                with buffer.getbuffer() as view:
+                                    image_data = _b64encode_str(view)
+                            mime_type = 'image/png'
 
-                            print(f"[NANO BANANA DEBUG] Image converted successfully, base64 size: {len(image_data)} bytes")
+                            logger.debug("Image converted successfully, base64 size: %d bytes", len(image_data))
                             break
                         else:
-                            print(f"[NANO BANANA ERROR] Image object has no _pil_image attribute")
-                            print(f"[NANO BANANA ERROR] Available attributes: {[a for a in dir(image_obj) if not a.startswith('__')]}")
-                    except Exception as img_error:
-                        print(f"[NANO BANANA ERROR] Failed to convert image: {img_error}")
-                        import traceback
-                        traceback.print_exc()
-
-            if not image_data:
-                print(f"[NANO BANANA ERROR] No image data found in response")
-                print(f"[NANO BANANA ERROR] Response parts count: {len(parts)}")
-                if len(parts) > 0:
-                    for i, part in enumerate(parts):
-                        print(f"[NANO BANANA ERROR] Part {i} has text: {part.text[:200] if hasattr(part, 'text') and part.text else 'None'}")
+                            logger.error("Image object has no _pil_image attribute")
+                            if logger.isEnabledFor(logging.DEBUG):
+                                logger.debug("Available attributes: %s", [a for a in dir(image_obj) if not a.startswith('__')])
+                    except Exception:
+                        logger.exception("Failed to convert image part %d", i)
+
+            if not image_bytes and not image_data:
+                logger.error("No image data found in response (%d parts)", len(parts))
+                for i, part in enumerate(parts):
+                    logger.error("Part %d has text: %s", i, part.text[:200] if hasattr(part, 'text') and part.text else 'None')
                 raise ValueError("No image data in response")
 
             # Cost estimate for Nano Banana ($30 per 1M tokens, 1290 tokens per image = ~$0.039)
             cost_per_image = 0.039
-            cost_estimate = cost_per_image * number_of_images
+            cost_estimate = cost_per_image
 
-            return {
-                "image_data": image_data,  # Base64 encoded PNG
-                "prompt": prompt,
-                "model": model_name,
-                "cost_estimate": f"${cost_estimate:.2f}",
-                "generation_time_ms": generation_time_ms
-            }
+            result = ImageResult(
+                mime_type=mime_type,
+                prompt=prompt,
+                model=model_name,
+                cost_estimate=f"${cost_estimate:.2f}",
+                generation_time_ms=generation_time_ms
+            )
+            # Store only the form we have; the other is derived on first access
+            if image_bytes:
+                result["image_bytes"] = image_bytes
+            else:
+                # The PIL fallback already produced base64
+                result["image_data"] = image_data
+
+            if candidate_count > 1:
+                # First image of every candidate, in candidate order; raw inline bytes
+                # (shared with the top-level result, not copied), base64 left lazy
+                images = []
+                for candidate in response.candidates or []:
+                    candidate_parts = candidate.content.parts if candidate.content and candidate.content.parts else []
+                    for part in candidate_parts:
+                        if part.inline_data and part.inline_data.data:
+                            images.append(ImageResult(
+                                image_bytes=part.inline_data.data,
+                                mime_type=part.inline_data.mime_type or 'image/png'
+                            ))
+                            break
+                logger.info("Received %d/%d candidate images", len(images), candidate_count)
+                result["images"] = images
+                result["cost_estimate"] = f"${cost_per_image * len(images):.2f}"
 
-        except Exception as e:
-            print(f"[NANO BANANA ERROR] Image generation failed: {str(e)}")
-            print(f"[NANO BANANA ERROR] Model: {model_name}, Prompt: {prompt[:100]}...")
-            import traceback
-            traceback.print_exc()
+            return result
+
+        except Exception:
+            logger.exception("Image generation failed (model: %s, prompt: %s...)", model_name, prompt[:100])
             raise
 
+    def generate_images_batch(self, prompts: List[str], model: Optional[str] = None, max_workers: int = 10) -> List[Optional[Dict]]:
+        """
+        Generate one image per prompt concurrently
+
+        Args:
+            prompts: Image description prompts
+            model: Model to use for every prompt (default: self.default_model)
+            max_workers: Maximum concurrent Gemini requests (calls are network-bound)
+
+        Returns:
+            List of generate_image results in prompt order (None where generation failed)
+        """
+        if not prompts:
+            return []
+
+        def generate(prompt):
+            try:
+                return self.generate_image(prompt=prompt, model=model)
+            except Exception as e:
+                logger.warning("Batch image failed: %s", e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+            return list(executor.map(generate, prompts))
+
     def edit_image(
         self,
         image_data: str,
@@ -178,30 +428,16 @@ class GeminiClient:
         start_time = time.time()
 
         try:
-            from PIL import Image as PILImage
-            from io import BytesIO
-
             print(f"[GEMINI EDIT] Using model: {model_name}")
             print(f"[GEMINI EDIT] Prompt: {prompt[:100]}...")
 
-            # Extract base64 data from data URI if present
-            if ',' in image_data:
-                header = image_data.split(',', 1)[0]
-                base64_data = image_data.split(',', 1)[1]
-                if 'png' in header.lower():
-                    mime_type = 'image/png'
-                elif 'webp' in header.lower():
-                    mime_type = 'image/webp'
-                else:
-                    mime_type = 'image/jpeg'
-            else:
-                base64_data = image_data
-                mime_type = 'image/jpeg'
+            # Extract mime type and base64 data from data URI if present
+            mime_type, base64_data = _split_data_uri(image_data)
 
             image_bytes = base64.b64decode(base64_data)
 
             # Verify it's a valid image
-            pil_image = PILImage.open(BytesIO(image_bytes))
+            pil_image = Image.open(BytesIO(image_bytes))
             print(f"[GEMINI EDIT] Input image: {pil_image.size}, mode: {pil_image.mode}")
 
             # Build content parts: image + edit prompt
@@ -220,13 +456,7 @@ class GeminiClient:
             generation_time_ms = int((time.time() - start_time) * 1000)
 
             # Extract image from response (same pattern as generate_image)
-            parts = []
-            if hasattr(response, 'parts'):
-                parts = response.parts
-            elif hasattr(response, 'candidates') and response.candidates:
-                candidate = response.candidates[0]
-                if hasattr(candidate, 'content') and hasattr(candidate.content, 'parts'):
-                    parts = candidate.content.parts
+            parts = _extract_parts(response)
 
             result_image_data = None
             for part in parts:
@@ -235,10 +465,11 @@ class GeminiClient:
                         image_obj = part.as_image()
                         if hasattr(image_obj, '_pil_image'):
                             result_pil = image_obj._pil_image
-                            buffer = BytesIO()
-                            result_pil.save(buffer, format='PNG')
-                            result_bytes = buffer.getvalue()
-                            result_image_data = base64.b64encode(result_bytes).decode('utf-8')
+                            # Same zero-copy PNG -> base64 path as generate_image
+                            with BytesIO() as buffer:
+                                result_pil.save(buffer, format='PNG', compress_level=1, optimize=False)
+                                with buffer.getbuffer() as view:
+                                    result_image_data = _b64encode_str(view)
                             print(f"[GEMINI EDIT] Output image: {result_pil.size}")
                             break
                     except Exception as img_error:
@@ -257,7 +488,6 @@ class GeminiClient:
 
         except Exception as e:
             print(f"[GEMINI EDIT ERROR] Image editing failed: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise
 
@@ -330,10 +560,41 @@ class GeminiClient:
 
         except Exception as e:
             print(f"[GEMINI TEXT ERROR] Content generation failed: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise
 
+    def _prepare_part(self, img_data: str, index: int = 1) -> Optional[types.Part]:
+        """Decode and validate one base64 image (data URI or raw) into an SDK Part, or None on failure"""
+        try:
+            # Extract base64 data from data URI (its declared type is re-checked below)
+            _, base64_data = _split_data_uri(img_data)
+
+            # Decode base64 to get image bytes (validate=True is pybase64's fastest path)
+            image_bytes = base64.b64decode(base64_data, validate=True)
+
+            # Validate and pick the mime type from the file signature rather than
+            # trusting the data-URI header (no pixel decode needed)
+            mime_type = _sniff_image_mime(image_bytes)
+            if not mime_type:
+                raise ValueError("Unrecognized image format (expected PNG, JPEG, GIF or WebP)")
+            print(f"[GEMINI VISION] Image {index}: {mime_type}, {len(image_bytes)} bytes")
+
+            if logger.isEnabledFor(logging.DEBUG):
+                # Full structural check only when debugging (verify() doesn't decode pixels)
+                with Image.open(BytesIO(image_bytes)) as pil_image:
+                    pil_image.verify()
+                    logger.debug("Image %d verified: %s, mode: %s", index, pil_image.size, pil_image.mode)
+
+            # Use types.Part with inline_data for proper SDK format
+            return types.Part.from_bytes(
+                data=image_bytes,
+                mime_type=mime_type
+            )
+
+        except Exception:
+            logger.exception("Failed to process vision image %d", index)
+            return None
+
     def analyze_images(
         self,
         images: list,
@@ -357,52 +618,14 @@ class GeminiClient:
             }
         """
         try:
-            from PIL import Image
-            from io import BytesIO
-
             print(f"[GEMINI VISION] Analyzing {len(images)} images")
 
-            # Build content parts with images and prompt
-            content_parts = []
-
-            for i, img_data in enumerate(images):
-                try:
-                    # Extract base64 data from data URI
-                    if ',' in img_data:
-                        header = img_data.split(',', 1)[0]
-                        base64_data = img_data.split(',', 1)[1]
-                        # Determine mime type from header
-                        if 'png' in header.lower():
-                            mime_type = 'image/png'
-                        elif 'gif' in header.lower():
-                            mime_type = 'image/gif'
-                        elif 'webp' in header.lower():
-                            mime_type = 'image/webp'
-                        else:
-                            mime_type = 'image/jpeg'
-                    else:
-                        base64_data = img_data
-                        mime_type = 'image/jpeg'
-
-                    # Decode base64 to get image bytes
-                    image_bytes = base64.b64decode(base64_data)
-
-                    # Verify it's a valid image by opening with PIL
-                    pil_image = Image.open(BytesIO(image_bytes))
-                    print(f"[GEMINI VISION] Image {i+1}: {pil_image.size}, mode: {pil_image.mode}")
-
-                    # Use types.Part with inline_data for proper SDK format
-                    image_part = types.Part.from_bytes(
-                        data=image_bytes,
-                        mime_type=mime_type
-                    )
-                    content_parts.append(image_part)
-
-                except Exception as img_error:
-                    print(f"[GEMINI VISION] Failed to process image {i+1}: {img_error}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+            # Decode/validate every image in parallel (base64 and PIL header parsing
+            # release the GIL); map() keeps the parts in the caller's order
+            with _cpu_executor(min(8, len(images)) or 1) as executor:
+                prepared = executor.map(self._prepare_part, images, range(1, len(images) + 1))
+                # Build content parts with images and prompt, skipping images that failed
+                content_parts = [part for part in prepared if part is not None]
 
             # Add the text prompt
             content_parts.append(prompt)
@@ -414,7 +637,8 @@ class GeminiClient:
             vision_model = "gemini-3-pro-preview"
             print(f"[GEMINI VISION] Using model: {vision_model}")
 
-            response = self.client.models.generate_content(
+            response = _call_with_retry(
+                self.client.models.generate_content,
                 model=vision_model,
                 contents=content_parts,
                 config=types.GenerateContentConfig(
@@ -425,57 +649,42 @@ class GeminiClient:
 
             # Extract text response with robust null checking
             analysis_text = ""
-            print(f"[GEMINI VISION DEBUG] Response type: {type(response)}")
-            print(f"[GEMINI VISION DEBUG] Response has text attr: {hasattr(response, 'text')}")
-            print(f"[GEMINI VISION DEBUG] Response.text value: {repr(response.text) if hasattr(response, 'text') else 'N/A'}")
-            print(f"[GEMINI VISION DEBUG] Response has candidates attr: {hasattr(response, 'candidates')}")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Vision response type: %s", type(response))
+                logger.debug("Vision response has text attr: %s", hasattr(response, 'text'))
+                logger.debug("Vision response.text value: %r", response.text if hasattr(response, 'text') else 'N/A')
+                logger.debug("Vision response has candidates attr: %s", hasattr(response, 'candidates'))
 
             # Try direct text attribute first
             if hasattr(response, 'text') and response.text:
                 analysis_text = response.text
-                print(f"[GEMINI VISION DEBUG] Got text directly from response.text")
-            # Then try candidates path with careful null checking
-            elif hasattr(response, 'candidates') and response.candidates is not None and len(response.candidates) > 0:
+                logger.debug("Got text directly from response.text")
+            # Then fall back to the first candidate's text parts
+            elif getattr(response, 'candidates', None):
                 candidate = response.candidates[0]
-                print(f"[GEMINI VISION DEBUG] Candidate type: {type(candidate)}")
-
-                # Check for finish_reason which may indicate blocking
-                if hasattr(candidate, 'finish_reason'):
-                    print(f"[GEMINI VISION DEBUG] Finish reason: {candidate.finish_reason}")
-
-                # Check for safety_ratings
-                if hasattr(candidate, 'safety_ratings') and candidate.safety_ratings:
-                    print(f"[GEMINI VISION DEBUG] Safety ratings: {candidate.safety_ratings}")
-
-                if hasattr(candidate, 'content') and candidate.content is not None:
-                    content = candidate.content
-                    print(f"[GEMINI VISION DEBUG] Content type: {type(content)}")
-                    print(f"[GEMINI VISION DEBUG] Content attrs: {[a for a in dir(content) if not a.startswith('_')]}")
-
-                    if hasattr(content, 'parts') and content.parts is not None:
-                        print(f"[GEMINI VISION DEBUG] Parts count: {len(content.parts)}")
-                        for i, part in enumerate(content.parts):
-                            print(f"[GEMINI VISION DEBUG] Part {i} type: {type(part)}")
-                            print(f"[GEMINI VISION DEBUG] Part {i} attrs: {[a for a in dir(part) if not a.startswith('_')]}")
-                            if hasattr(part, 'text') and part.text:
-                                analysis_text += part.text
-                    else:
-                        print(f"[GEMINI VISION DEBUG] content.parts is None or missing")
-                else:
-                    print(f"[GEMINI VISION DEBUG] candidate.content is None or missing")
-                    # Try to inspect candidate attributes
-                    print(f"[GEMINI VISION DEBUG] Candidate attrs: {[a for a in dir(candidate) if not a.startswith('_')]}")
+                if debug:
+                    # finish_reason / safety_ratings explain blocked or empty replies
+                    logger.debug("Finish reason: %s", getattr(candidate, 'finish_reason', None))
+                    logger.debug("Safety ratings: %s", getattr(candidate, 'safety_ratings', None))
+
+                parts = _extract_parts(response)
+                logger.debug("Parts count: %d", len(parts))
+                for part in parts:
+                    text = getattr(part, 'text', None)
+                    if text:
+                        analysis_text += text
             else:
-                print(f"[GEMINI VISION DEBUG] No candidates in response")
+                logger.debug("No candidates in response")
                 # Try to get any useful info from response
-                if hasattr(response, '__dict__'):
-                    print(f"[GEMINI VISION DEBUG] Response attrs: {list(response.__dict__.keys())}")
+                if debug and hasattr(response, '__dict__'):
+                    logger.debug("Response attrs: %s", list(response.__dict__.keys()))
 
             print(f"[GEMINI VISION] Analysis complete: {len(analysis_text)} chars")
 
             # Return result even if empty (let caller handle it)
             if not analysis_text:
-                print(f"[GEMINI VISION WARNING] No analysis text extracted from response")
+                logger.warning("No analysis text extracted from vision response")
                 analysis_text = "Image analyzed but no description was generated."
 
             return {
@@ -483,26 +692,46 @@ class GeminiClient:
                 "model": vision_model
             }
 
-        except Exception as e:
-            print(f"[GEMINI VISION ERROR] Image analysis failed: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Gemini image analysis failed")
             raise
 
-    def search_web(self, query: str, max_results: int = 5) -> list:
+    def search_web(self, query: str, max_results: int = 5, force_refresh: bool = False) -> list:
         """
-        Search web using Gemini with Google Search grounding
+        Search web using Gemini with Google Search grounding (cached for 6 hours)
 
         Args:
             query: Search query
             max_results: Maximum number of results
+            force_refresh: Skip the cache and re-run the search
 
         Returns:
             List of search results with title, description, url
         """
+        key = hashlib.blake2b(f"{query}|{max_results}".encode(), digest_size=16).hexdigest()
+
+        if not force_refresh:
+            with _search_cache_lock:
+                cached = _search_cache.get(key)
+            if cached is not None:
+                logger.info("Search cache hit for: %s", query[:60])
+                # Deep copy so callers editing a result dict can't alter the cached entry
+                return copy.deepcopy(cached)
+
+        results = self._search_web(query, max_results)
+
+        # Empty results usually mean an error or an unparseable reply, so don't pin them
+        if results:
+            with _search_cache_lock:
+                _search_cache[key] = results
+        return copy.deepcopy(results)
+
+    def _search_web(self, query: str, max_results: int) -> list:
+        """Run the Google Search grounded Gemini call behind search_web"""
         try:
             # Use Gemini 2.0 Flash with Google Search grounding
-            response = self.client.models.generate_content(
+            response = _call_with_retry(
+                self.client.models.generate_content,
                 model="gemini-2.0-flash-exp",
                 contents=[f"""Search Google for {max_results} recent, real articles about: {query}
 
@@ -527,46 +756,37 @@ Return ONLY the JSON array."""],
                 )
             )
 
-            # Extract results
+            # Extract results: locate the JSON array in one pass, whether or not the
+            # model wrapped it in a ```json fence
             results = []
-            if response.text:
-                content = response.text.strip()
-                # Remove markdown code blocks if present
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-
+            match = _JSON_ARRAY_RE.search(response.text or '')
+            if match:
                 try:
-                    import json
-                    results = json.loads(content)
-                    if isinstance(results, list):
-                        return results[:max_results]
-                except:
-                    pass
+                    results = _json_loads(match.group(0))
+                except ValueError as e:  # orjson.JSONDecodeError subclasses ValueError
+                    print(f"Gemini web search returned invalid JSON: {e}")
 
-            return results[:max_results] if results else []
+            return results[:max_results] if isinstance(results, list) else []
 
         except Exception as e:
             print(f"Gemini web search error: {e}")
-            import traceback
             traceback.print_exc()
             return []
 
-    def search_wedding_news(self, month: str) -> list:
+    def search_wedding_news(self, month: str, force_refresh: bool = False) -> list:
         """Search for wedding venue industry news"""
         query = f"wedding venue industry news statistics data trends 2025 2026 {month}"
-        return self.search_web(query, max_results=15)  # Get more results for refresh pool
+        return self.search_web(query, max_results=15, force_refresh=force_refresh)  # Get more results for refresh pool
 
-    def search_wedding_tips(self, month: str) -> list:
+    def search_wedding_tips(self, month: str, force_refresh: bool = False) -> list:
         """Search for wedding venue management tips"""
         query = f"wedding venue marketing tips advice strategies 2025 2026 {month}"
-        return self.search_web(query, max_results=15)  # Get more results for refresh pool
+        return self.search_web(query, max_results=15, force_refresh=force_refresh)  # Get more results for refresh pool
 
-    def search_wedding_trends(self, month: str, season: str) -> list:
+    def search_wedding_trends(self, month: str, season: str, force_refresh: bool = False) -> list:
         """Search for seasonal wedding trends"""
         query = f"wedding trends {season} 2025 2026 venue decor planning {month}"
-        return self.search_web(query, max_results=15)  # Get more results for refresh pool
+        return self.search_web(query, max_results=15, force_refresh=force_refresh)  # Get more results for refresh pool
 
     def generate_newsletter_image(
         self,
@@ -587,20 +807,12 @@ Return ONLY the JSON array."""],
         Returns:
             Image generation result
         """
-        # Base style for all venue newsletter images
-        base_style = "Professional, elegant, modern wedding venue photography, warm natural lighting, high-end aesthetic, sophisticated composition"
-
-        # Section-specific styles
-        style_additions = {
-            "news": "editorial style, newsworthy scene, subtle branding elements, contemporary venue space",
-            "tip": "intimate venue details, personalized touches, client-focused perspective, welcoming atmosphere",
-            "trend": "seasonal wedding decor, trendy color palette, stylish arrangements, inspirational setting"
-        }
-
-        section_style = style_additions.get(section_type, "")
-
         # Construct optimized prompt
-        prompt = f"{title} - {base_style}, {section_style}. {content_summary}"
+        prompt = _PROMPT_TMPL.format(
+            title=title,
+            section_style=_STYLE_ADDITIONS.get(section_type, ""),
+            content=content_summary
+        )
 
         return self.generate_image(
             prompt=prompt,
@@ -611,11 +823,14 @@ Return ONLY the JSON array."""],
 
 # Singleton instance
 _gemini_client = None
+_gemini_client_lock = threading.Lock()
 
 
 def get_gemini_client() -> GeminiClient:
-    """Get or create Gemini client singleton"""
+    """Get or create Gemini client singleton (thread-safe)"""
     global _gemini_client
     if _gemini_client is None:
-        _gemini_client = GeminiClient()
+        with _gemini_client_lock:
+            if _gemini_client is None:
+                _gemini_client = GeminiClient()
     return _gemini_client
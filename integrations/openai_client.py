@@ -5,18 +5,31 @@ OpenAI API integration for content generation
 import os
 import time
 from typing import Dict, List, Optional
-from openai import OpenAI
+import httpx
+from openai import OpenAI, DefaultHttpxClient
 import json
 
+# The SDK's default pool drops idle sockets after 5s, which would discard the
+# connection warm_up() opens at boot (and the one between back-to-back requests)
+OPENAI_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=60.0)
+
 
 class OpenAIClient:
     """Wrapper for OpenAI API calls"""
 
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        self.client = OpenAI(
+            api_key=self.api_key,
+            http_client=DefaultHttpxClient(limits=OPENAI_HTTP_LIMITS)
+        ) if self.api_key else None
         self.default_model = os.getenv("DEFAULT_CONTENT_MODEL", "gpt-4o")
 
+    def warm_up(self):
+        """Open the API connection ahead of the first request (free models.list call)"""
+        if self.client:
+            self.client.models.list()
+
     def generate_content(
         self,
         prompt: str,
@@ -0,0 +1,124 @@
+"""
+Image post-processing for generated ads
+Pads Gemini output to the exact platform size and re-encodes it as JPEG (or
+assembles animation frames into a GIF).
+Kept free of app imports so process-pool workers load only this module, and
+fully annotated so the Docker build can compile it with mypyc.
+"""
+
+import base64
+import hashlib
+import os
+from io import BytesIO
+from typing import List, Tuple
+from PIL import Image, ImageOps
+
+
+def pad_to_size(pil_image: Image.Image, target_width: int, target_height: int) -> Image.Image:
+    """
+    Pad a PIL image to the exact target size (no cropping) and return it in RGB.
+    Skips the resample when the size already matches and uses BILINEAR instead of
+    LANCZOS when both dimensions are within 2% of the target.
+    """
+    source_width, source_height = pil_image.size
+    if (source_width, source_height) != (target_width, target_height):
+        close = abs(source_width / target_width - 1) < 0.02 and abs(source_height / target_height - 1) < 0.02
+        resampler = Image.Resampling.BILINEAR if close else Image.Resampling.LANCZOS
+        pil_image = ImageOps.pad(pil_image, (target_width, target_height), resampler, color=(255, 255, 255), centering=(0.5, 0.5))
+
+    if pil_image.mode != 'RGB':
+        pil_image = pil_image.convert('RGB')
+    return pil_image
+
+
+def _encode_jpeg(image_bytes: bytes, target_width: int, target_height: int) -> BytesIO:
+    """Pad raw image bytes to the target size and return a buffer holding the compressed JPEG"""
+    pil_image = Image.open(BytesIO(image_bytes))
+
+    # Pad to the exact dimensions while keeping the entire image visible (no cropping).
+    # When no resize/convert is needed this is still the lazily-decoded source image,
+    # so the output must not share its input buffer
+    padded = pad_to_size(pil_image, target_width, target_height)
+
+    # Convert to JPEG with compression to reduce size
+    buffer = BytesIO()
+    padded.save(buffer, format='JPEG', quality=85, optimize=False, progressive=False)
+
+    print(f"[API] Final: {padded.size}, compressed from {len(image_bytes)} to {buffer.tell()} bytes")
+    return buffer
+
+
+def postprocess(image_bytes: bytes, target_width: int, target_height: int) -> str:
+    """
+    Pad raw Gemini image bytes to the target size and re-encode them as compressed
+    JPEG base64. Top-level so it can be pickled into the process pool.
+    """
+    buffer = _encode_jpeg(image_bytes, target_width, target_height)
+    # Encode straight from the buffer's memory instead of copying it out with getvalue()
+    with buffer.getbuffer() as view:
+        return base64.b64encode(view).decode('ascii')
+
+
+def postprocess_to_file(image_bytes: bytes, target_width: int, target_height: int, directory: str) -> str:
+    """
+    Like postprocess, but write the JPEG into directory (content-addressed, so
+    repeats are written once) and return its filename instead of base64. A repeat
+    refreshes the file's mtime so age-based eviction treats it as new.
+    """
+    buffer = _encode_jpeg(image_bytes, target_width, target_height)
+    with buffer.getbuffer() as view:
+        filename = f"{hashlib.sha256(view).hexdigest()[:16]}.jpg"
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(view)
+    return filename
+
+
+def build_animation(frames: List[bytes], width: int, height: int, fps: float, include_frames: bool) -> Tuple[str, List[str], int]:
+    """
+    Pad raw frame images to width x height and assemble them into a looping GIF.
+
+    Returns (GIF base64, per-frame JPEG base64 for editing, frame count). The
+    per-frame list is empty unless include_frames; undecodable frames are skipped.
+    """
+    padded: List[Image.Image] = []
+    for index, frame_bytes in enumerate(frames):
+        try:
+            # Resize to exact dimensions (pad to keep entire image visible, no cropping)
+            padded.append(pad_to_size(Image.open(BytesIO(frame_bytes)), width, height))
+        except Exception as frame_error:
+            print(f"[API ERROR] Failed to decode frame {index + 1}: {frame_error}")
+
+    if not padded:
+        return '', [], 0
+
+    # JPEG encodes far faster than PNG on photographic frames
+    frame_images: List[str] = []
+    if include_frames:
+        for frame in padded:
+            with BytesIO() as frame_buffer:
+                frame.save(frame_buffer, format='JPEG', quality=85, optimize=False)
+                with frame_buffer.getbuffer() as view:
+                    frame_images.append(base64.b64encode(view).decode('ascii'))
+
+    # Quantize once with the fast octree palette, then save without the extra optimize pass
+    palette_frames = [frame.quantize(method=Image.Quantize.FASTOCTREE) for frame in padded]
+
+    gif_buffer = BytesIO()
+    palette_frames[0].save(
+        gif_buffer,
+        format='GIF',
+        save_all=True,
+        append_images=palette_frames[1:],
+        duration=int(1000 / fps),  # Duration per frame in milliseconds
+        loop=0,  # Infinite loop
+        optimize=False
+    )
+
+    print(f"[API] GIF assembled: {len(padded)} frames, {gif_buffer.tell()} bytes")
+    with gif_buffer.getbuffer() as view:
+        return base64.b64encode(view).decode('ascii'), frame_images, len(padded)